@@ -1,2 +1,12 @@
-from your_assistant.core.llm import RevChatGPT
+from typing import Any
+
 from your_assistant.core.utils import load_env
+
+
+def __getattr__(name: str) -> Any:
+    # Import the LLMs lazily, they pull in heavy client libraries.
+    if name == "RevChatGPT":
+        from your_assistant.core.llm import RevChatGPT
+
+        return RevChatGPT
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -2,25 +2,115 @@
 
 """
 import argparse
+import functools
+import hashlib
 import json
 import os
-import re
+import shutil
+import sqlite3
+import threading
+import uuid
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Set, Tuple
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple, Union
 from urllib.parse import urlparse
 
+import faiss
 import nltk
+import numpy as np
 from langchain.docstore.document import Document
+from langchain.docstore.in_memory import InMemoryDocstore
 from langchain.document_loaders import UnstructuredFileLoader
 from langchain.document_loaders.base import BaseLoader
 from langchain.embeddings import OpenAIEmbeddings
 from langchain.embeddings.base import Embeddings
 from langchain.text_splitter import TokenTextSplitter
-from langchain.vectorstores import FAISS, VectorStore
+from langchain.vectorstores import FAISS
 
 import your_assistant.core.loader as loader_lib
 import your_assistant.core.utils as utils
 
+# Whether a character is neither a word character nor a whitespace, e.g. punctuations.
+_IS_PUNCTUATION: Dict[str, bool] = {}
+
+
+def strip_punctuation(text: str) -> str:
+    """Remove the characters that are neither word characters nor whitespaces,
+    same as removing the matches of the regex [^\\w\\s]. The deletion table only
+    covers the distinct characters of the text, so the removal is a single
+    str.translate.
+
+    Args:
+        text (str): The text to clean.
+
+    Returns:
+        str: The text without punctuations.
+    """
+    table: Dict[int, None] = {}
+    for char in set(text):
+        is_punctuation = _IS_PUNCTUATION.get(char)
+        if is_punctuation is None:
+            is_punctuation = not (char.isalnum() or char == "_" or char.isspace())
+            _IS_PUNCTUATION[char] = is_punctuation
+        if is_punctuation:
+            table[ord(char)] = None
+    return text.translate(table)
+
+
+_NLTK_LOCK = threading.Lock()
+_nltk_tagger_ready = False
+
+
+def ensure_nltk_tagger() -> None:
+    """Make sure the nltk tagger used by the unstructured partitioning is available.
+    The tagger is only downloaded if missing, and only checked once per process.
+    """
+    global _nltk_tagger_ready
+    with _NLTK_LOCK:
+        if _nltk_tagger_ready:
+            return
+        try:
+            nltk.data.find("taggers/averaged_perceptron_tagger")
+        except LookupError:
+            nltk.download("averaged_perceptron_tagger", quiet=True)
+        _nltk_tagger_ready = True
+
+
+@functools.lru_cache(maxsize=8)
+def get_text_splitter(chunk_size: int, chunk_overlap: int) -> TokenTextSplitter:
+    """Get the token text splitter, memoized so the tokenizer is set up once per
+    chunk configuration.
+
+    Args:
+        chunk_size (int): The chunk size to split the text.
+        chunk_overlap (int): The chunk overlap to split the text.
+
+    Returns:
+        TokenTextSplitter: The text splitter.
+    """
+    return TokenTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+
+
+def load_and_split(
+    loader: BaseLoader, chunk_size: int, chunk_overlap: int
+) -> List[Document]:
+    """Load a file and split it into chunks. Used by the worker processes when
+    indexing multiple files, as parsing the files is CPU bound.
+
+    Args:
+        loader (BaseLoader): The loader to load the file.
+        chunk_size (int): The chunk size to split the text.
+        chunk_overlap (int): The chunk overlap to split the text.
+
+    Returns:
+        List[Document]: The chunks of the file.
+    """
+    return loader.load_and_split(
+        text_splitter=get_text_splitter(
+            chunk_size=chunk_size, chunk_overlap=chunk_overlap
+        )
+    )
+
 
 class KnowledgeIndexer:
     def __init__(self, args: argparse.Namespace):
@@ -31,10 +121,13 @@ class KnowledgeIndexer:
             embeddings_tool_name: The name of the embedding tool to use, e.g. openai.
         """
         self.verbose = False if not args.verbose else args.verbose
-        nltk.download("averaged_perceptron_tagger")
         self.logger = utils.Logger("KnowledgeIndexer", verbose=self.verbose)
         self.supported_file_types: Set[str] = self._init_supported_file_types()
         self.embeddings_tool = self._init_embeddings_tool(args=args)
+        # The openai client keeps one HTTP session per thread, so the threads sending
+        # the embedding requests are kept across calls to reuse the connections.
+        self.embeddings_executor: Optional[ThreadPoolExecutor] = None
+        self.embeddings_concurrency = 0
         # Initialize the db index engine (e.g. FAISS) and db index record.
         if not args.db_path:
             raise ValueError("db_path is not specified.")
@@ -76,7 +169,12 @@ class KnowledgeIndexer:
             raise ValueError("db_path is not specified.")
         self.db_index_path = os.path.join(args.db_path, "index")
         self.embeddings_db_engine = FAISS
-        self.embeddings_db: Optional[VectorStore] = None
+        self.embeddings_db: Optional[FAISS] = None
+        old_index_path = f"{self.db_index_path}.old"
+        if not os.path.exists(self.db_index_path) and os.path.exists(old_index_path):
+            # The last save stopped between moving the old db aside and the new in.
+            self.logger.warning(f"DB [{self.db_index_path}] missing, restore it.")
+            os.rename(old_index_path, self.db_index_path)
         if os.path.exists(self.db_index_path):
             self.logger.info(f"DB [{self.db_index_path}] exists, load it.")
             self.embeddings_db = self.embeddings_db_engine.load_local(
@@ -85,60 +183,169 @@ class KnowledgeIndexer:
 
     def _init_index_recorder(self, args: argparse.Namespace) -> None:
         """Initialize the index recorder. The index recorder stores the information
-        on which document has been indexed.
+        on which document and chunk have been indexed, in a sqlite db so that each
+        lookup or update only touches a single row.
 
         Args:
             args (argparse.Namespace): The arguments passed in.
         """
-        self.db_record_path = os.path.join(args.db_path, "index_record.json")
-        self.index_record_path = Path(self.db_record_path)
-        # Create the index record if not exist.
-        if not self.index_record_path.exists():
-            self.logger.info(
-                f"Index record file {self.index_record_path} does not exist. Create one."
+        if not os.path.exists(args.db_path):
+            os.makedirs(args.db_path)
+        self.db_record_path = os.path.join(args.db_path, "index_record.db")
+        self.index_record_db = sqlite3.connect(self.db_record_path)
+        with self.index_record_db:
+            self.index_record_db.execute(
+                "CREATE TABLE IF NOT EXISTS indexed_doc (source TEXT PRIMARY KEY)"
+            )
+            self.index_record_db.execute(
+                "CREATE TABLE IF NOT EXISTS indexed_chunk (hash BLOB PRIMARY KEY)"
+            )
+        # Migrate the legacy json index record if exists.
+        legacy_record_path = Path(os.path.join(args.db_path, "index_record.json"))
+        if legacy_record_path.exists():
+            self.logger.info(f"Migrate index record file {legacy_record_path}.")
+            with legacy_record_path.open("r") as f:
+                try:
+                    indexed_doc = json.load(f).get("indexed_doc", [])
+                except json.decoder.JSONDecodeError:
+                    indexed_doc = []
+            with self.index_record_db:
+                self.index_record_db.executemany(
+                    "INSERT OR IGNORE INTO indexed_doc (source) VALUES (?)",
+                    ((source,) for source in indexed_doc),
+                )
+            legacy_record_path.unlink()
+        # The documents indexed in memory but not saved yet, with their chunk hashes.
+        self.unsaved_records: Dict[str, Set[bytes]] = {}
+        self.unsaved_chunk_hashes: Set[bytes] = set()
+
+    def _is_indexed(self, source: str) -> bool:
+        """Check whether a source has been indexed.
+
+        Args:
+            source (str): The source of the documents.
+
+        Returns:
+            bool: Whether the source has been indexed.
+        """
+        if source in self.unsaved_records:
+            return True
+        row = self.index_record_db.execute(
+            "SELECT 1 FROM indexed_doc WHERE source = ?", (source,)
+        ).fetchone()
+        return row is not None
+
+    def _is_chunk_indexed(self, chunk_hash: bytes) -> bool:
+        """Check whether a chunk with the same content has been indexed.
+
+        Args:
+            chunk_hash (bytes): The hash of the chunk content.
+
+        Returns:
+            bool: Whether the chunk has been indexed.
+        """
+        if chunk_hash in self.unsaved_chunk_hashes:
+            return True
+        row = self.index_record_db.execute(
+            "SELECT 1 FROM indexed_chunk WHERE hash = ?", (chunk_hash,)
+        ).fetchone()
+        return row is not None
+
+    def _record_indexed(self, source: str, chunk_hashes: Iterable[bytes] = ()) -> None:
+        """Record a source and its chunks as indexed.
+
+        Args:
+            source (str): The source of the documents.
+            chunk_hashes (Iterable[bytes], optional): The hashes of the indexed chunks.
+        """
+        with self.index_record_db:
+            self.index_record_db.execute(
+                "INSERT OR IGNORE INTO indexed_doc (source) VALUES (?)", (source,)
+            )
+            self.index_record_db.executemany(
+                "INSERT OR IGNORE INTO indexed_chunk (hash) VALUES (?)",
+                ((chunk_hash,) for chunk_hash in chunk_hashes),
             )
-            if not os.path.exists(os.path.dirname(self.index_record_path)):
-                os.makedirs(os.path.dirname(self.index_record_path))
-            self.index_record_path.touch()
-        # Load the index record.
-        self.index_record: Dict[str, Any] = {}
-        with self.index_record_path.open("r+") as f:
-            try:
-                self.index_record = json.load(f)
-            except json.decoder.JSONDecodeError:
-                self.index_record["indexed_doc"] = {}
-        self.index_record["indexed_doc"] = set(self.index_record["indexed_doc"])
 
     def index(
         self,
-        path: str,
+        path: Union[str, List[str]],
         chunk_size: int = 500,
         chunk_overlap: int = 50,
         batch_size: int = 50,
+        concurrency: int = 20,
+        index_type: str = "flat",
     ) -> str:
-        """Index a given file into the vector DB according to the name.
+        """Index the given files into the vector DB according to the name.
+        Multiple files are parsed in parallel by a process pool, and a file that
+        fails to be indexed is reported without stopping the others.
 
         Args:
-            path (str): The path to the file. Can be a url.
+            path (Union[str, List[str]]): The path to the file, or a list of paths. Can be a url.
             chunk_size (int, optional): The chunk size to split the text. Defaults to 500.
             chunk_overlap (int, optional): The chunk overlap to split the text. Defaults to 50.
             batch_size (int, optional): The batch size to index the embeddings. Defaults to 50.
+            concurrency (int, optional): The max number of embedding batches in flight. Defaults to 20.
+            index_type (str, optional): The type of the index used when creating a new db,
+                "flat" for exact search or "hnsw" for approximate search at scale. Defaults to "flat".
 
         Returns:
             str: The status of the indexing.
         """
-        self.logger.info(f"Indexing {path}...")
-        loader, source, downloaded_path = self._init_loader(path=path)
-        documents = self._extract_data(
-            loader=loader, chunk_size=chunk_size, chunk_overlap=chunk_overlap
-        )
-        is_indexed = self._index_embeddings(
-            documents=documents, source=source, batch_size=batch_size
-        )
-        # Remove the downloaded file.
-        if os.path.exists(downloaded_path):
-            os.remove(downloaded_path)
-        return f"Index {source} finished." if is_indexed else ""
+        paths = [path] if isinstance(path, str) else path
+        self.logger.info(f"Indexing {', '.join(paths)}...")
+        loaders = []
+        for file_path in paths:
+            loader, source, downloaded_path = self._init_loader(path=file_path)
+            # Skip the indexed files before parsing them.
+            if self._is_indexed(source):
+                self.logger.info(f"File {source} already indexed. Skip.")
+                if os.path.exists(downloaded_path):
+                    os.remove(downloaded_path)
+                continue
+            loaders.append((loader, source, downloaded_path))
+        documents_list: Iterable[Iterable[Document]]
+        if len(loaders) > 1:
+            documents_list = self._extract_data_in_parallel(
+                loaders=[loader for loader, _, _ in loaders],
+                chunk_size=chunk_size,
+                chunk_overlap=chunk_overlap,
+            )
+        else:
+            documents_list = [
+                self._extract_data(
+                    loader=loader, chunk_size=chunk_size, chunk_overlap=chunk_overlap
+                )
+                for loader, _, _ in loaders
+            ]
+        statuses = []
+        try:
+            for (_, source, downloaded_path), documents in zip(loaders, documents_list):
+                try:
+                    is_indexed = self._index_embeddings(
+                        documents=documents,
+                        source=source,
+                        batch_size=batch_size,
+                        concurrency=concurrency,
+                        index_type=index_type,
+                        save=False,
+                    )
+                except Exception as e:
+                    if len(loaders) == 1:
+                        raise
+                    self.logger.error(f"Failed to index {source}: {e}")
+                    statuses.append(f"Index {source} failed: {e}")
+                    continue
+                finally:
+                    # Remove the downloaded file.
+                    if os.path.exists(downloaded_path):
+                        os.remove(downloaded_path)
+                if is_indexed:
+                    statuses.append(f"Index {source} finished.")
+        finally:
+            # Save the db once for all the files.
+            self._save_index()
+        return "\n".join(statuses)
 
     def _init_loader(self, path: str) -> Tuple[BaseLoader, str, str]:
         """Initialize the loader based on the file path and type.
@@ -172,6 +379,8 @@ class KnowledgeIndexer:
                 elif extension == ".pdf":
                     loader = loader_lib.PdfLoader(path=path)
                 elif extension in self.supported_file_types:
+                    # Only the unstructured partitioning needs the nltk tagger.
+                    ensure_nltk_tagger()
                     loader = UnstructuredFileLoader(path)
                 source = path
             else:
@@ -180,64 +389,348 @@ class KnowledgeIndexer:
             raise e
         return loader, source, downloaded_path
 
-    def _extract_data(
-        self, loader: BaseLoader, chunk_size: int = 500, chunk_overlap: int = 50
-    ) -> List[Document]:
-        """Index a PDF file.
+    def _check_chunk_params(self, chunk_size: int, chunk_overlap: int) -> None:
+        """Check the chunk size and overlap to split the text.
 
         Args:
-            loader (Any): The loader to load the file.
+            chunk_size (int): The chunk size to split the text.
+            chunk_overlap (int): The chunk overlap to split the text.
         """
         if chunk_size <= chunk_overlap:
             raise ValueError(
                 f"Chunk size [{chunk_size}] must be larger than chunk overlap [{chunk_overlap}]."
             )
-        documents = loader.load_and_split(
-            text_splitter=TokenTextSplitter(
-                chunk_size=chunk_size, chunk_overlap=chunk_overlap
-            )
+
+    def _extract_data(
+        self, loader: BaseLoader, chunk_size: int = 500, chunk_overlap: int = 50
+    ) -> Iterable[Document]:
+        """Extract the chunks of a file. The chunks are split lazily page by page
+        so that the whole file does not need to be held in memory as chunks.
+
+        Args:
+            loader (Any): The loader to load the file.
+
+        Returns:
+            Iterable[Document]: The chunks of the file.
+        """
+        self._check_chunk_params(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+        text_splitter = get_text_splitter(
+            chunk_size=chunk_size, chunk_overlap=chunk_overlap
+        )
+        # Only the local loaders yield the pages lazily, BaseLoader.lazy_load may
+        # exist but raise NotImplementedError.
+        if isinstance(loader, (loader_lib.PdfLoader, loader_lib.EpubLoader)):
+            documents = loader.lazy_load()
+        else:
+            documents = iter(loader.load())
+        return (
+            chunk
+            for document in documents
+            for chunk in text_splitter.split_documents([document])
         )
-        return documents
+
+    def _extract_data_in_parallel(
+        self, loaders: List[BaseLoader], chunk_size: int = 500, chunk_overlap: int = 50
+    ) -> Iterable[Iterable[Document]]:
+        """Extract the chunks of multiple files, each file is parsed in its own process.
+        The files are yielded in order, and only one file per process is parsed ahead
+        of the file being consumed, so the chunks of all the files are not held in
+        memory at once.
+
+        Args:
+            loaders (List[BaseLoader]): The loaders to load the files.
+
+        Returns:
+            Iterable[Iterable[Document]]: The chunks of each file. The error of a file
+                that fails to be parsed is raised when its chunks are iterated.
+        """
+
+        def iter_chunks(future: Future) -> Iterable[Document]:
+            yield from future.result()
+
+        self._check_chunk_params(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+        max_workers = min(len(loaders), os.cpu_count() or 1)
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            futures: List[Future] = []
+            for loader in loaders:
+                futures.append(
+                    pool.submit(
+                        load_and_split,
+                        loader,
+                        chunk_size=chunk_size,
+                        chunk_overlap=chunk_overlap,
+                    )
+                )
+                if len(futures) > max_workers:
+                    yield iter_chunks(futures.pop(0))
+            for future in futures:
+                yield iter_chunks(future)
 
     def _index_embeddings(
-        self, documents: List[Document], source: str, batch_size: int = 100
+        self,
+        documents: Iterable[Document],
+        source: str,
+        batch_size: int = 100,
+        concurrency: int = 20,
+        index_type: str = "flat",
+        save: bool = True,
     ) -> bool:
-        """Index a file.
+        """Index a file. The documents are consumed as a stream and embedded once
+        enough of them are buffered to fill all the concurrent embedding requests.
+        The vectors are staged in a separate index and only added to the vector db
+        when the whole file is embedded, so a failure midway leaves the db untouched.
 
         Args:
-            documents (Any): The documents to index.
+            documents (Iterable[Document]): The documents to index.
             source (str): The source of the documents.
+            batch_size (int, optional): The number of documents per embedding request.
+            concurrency (int, optional): The max number of embedding requests in flight.
+            index_type (str, optional): The type of the index if a new db is created.
+            save (bool, optional): Whether to save the db after indexing, otherwise
+                the db is saved by the next call of _save_index.
         """
-        self.index_record["indexed_doc"] = set(self.index_record["indexed_doc"])
-        if source in self.index_record["indexed_doc"]:
+        if self._is_indexed(source):
             self.logger.info(f"File {source} already indexed. Skip.")
             return False
-        # Update the source of each document.
+        num_documents, num_duplicates = 0, 0
+        chunk_hashes: Set[bytes] = set()
+        buffer: List[Document] = []
+        staging_db: Optional[FAISS] = None
         for doc in documents:
+            # Update the source of each document.
             doc.metadata["source"] = source
-            doc.page_content = re.sub(r"[^\w\s]|['\"]", "", doc.page_content)
-        # Index the new documents in batches.
-        for idx, document_batch in enumerate(utils.chunk_list(documents, batch_size)):
-            if self.verbose:
-                self.logger.info(
-                    f"Indexing {len(document_batch)} documents (batch {idx})."
+            doc.page_content = strip_punctuation(doc.page_content)
+            # Skip the repeated chunks, e.g. headers and footers.
+            chunk_hash = hashlib.sha256(
+                " ".join(doc.page_content.split()).encode()
+            ).digest()
+            if chunk_hash in chunk_hashes or self._is_chunk_indexed(chunk_hash):
+                num_duplicates += 1
+                continue
+            chunk_hashes.add(chunk_hash)
+            buffer.append(doc)
+            if len(buffer) >= batch_size * concurrency:
+                staging_db = self._add_documents(
+                    documents=buffer,
+                    db=staging_db,
+                    batch_size=batch_size,
+                    concurrency=concurrency,
                 )
-            new_db = self.embeddings_db_engine.from_documents(
-                document_batch, self.embeddings_tool
+                num_documents += len(buffer)
+                buffer.clear()
+        if buffer:
+            staging_db = self._add_documents(
+                documents=buffer,
+                db=staging_db,
+                batch_size=batch_size,
+                concurrency=concurrency,
             )
-            if self.embeddings_db:
-                self.embeddings_db.merge_from(new_db)  # type: ignore
-            else:
-                self.embeddings_db = new_db
-        self.logger.info(f"Indexing done. {len(documents)} documents indexed.")
-        self.embeddings_db.save_local(self.db_index_path)  # type: ignore
-        # Record the newly indexed documents. Delete the old index first.
-        self.index_record["indexed_doc"].add(source)
-        self.index_record["indexed_doc"] = list(self.index_record["indexed_doc"])
-        index_size = len(self.index_record["indexed_doc"])
-        self.index_record_path.unlink()
-        with self.index_record_path.open("w") as f:
-            json.dump(self.index_record, f, indent=2)
-            self.logger.info(f"Updated index record with [{index_size}] records.")
-        self.logger.info(f"DB saved to {self.db_path}.")
+            num_documents += len(buffer)
+        if staging_db:
+            self._merge_embeddings_db(staging_db=staging_db, index_type=index_type)
+        elif not self.embeddings_db:
+            self.logger.warning(f"No document extracted from {source}. Skip.")
+            return False
+        self.logger.info(
+            f"Indexing done. {num_documents} documents indexed, "
+            + f"{num_duplicates} duplicates skipped."
+        )
+        self.unsaved_records[source] = chunk_hashes
+        self.unsaved_chunk_hashes.update(chunk_hashes)
+        if save:
+            self._save_index()
         return True
+
+    def _save_index(self) -> None:
+        """Save the vector db, then record the documents indexed since the last save."""
+        if not self.unsaved_records:
+            return
+        self._save_embeddings_db()
+        self.logger.info(f"DB saved to {self.db_path}.")
+        for source, chunk_hashes in self.unsaved_records.items():
+            self._record_indexed(source, chunk_hashes=chunk_hashes)
+        self.logger.info(f"Updated index record with {list(self.unsaved_records)}.")
+        self.unsaved_records.clear()
+        self.unsaved_chunk_hashes.clear()
+
+    def _save_embeddings_db(self) -> None:
+        """Save the vector db. The db is written to a temporary folder which then
+        swaps places with the current one, so that the index and the docstore
+        files on disk always come from the same save.
+        """
+        if not self.embeddings_db:
+            return
+        tmp_index_path = f"{self.db_index_path}.tmp"
+        old_index_path = f"{self.db_index_path}.old"
+        for path in (tmp_index_path, old_index_path):
+            shutil.rmtree(path, ignore_errors=True)
+        self.embeddings_db.save_local(tmp_index_path)
+        if os.path.exists(self.db_index_path):
+            os.rename(self.db_index_path, old_index_path)
+        os.rename(tmp_index_path, self.db_index_path)
+        shutil.rmtree(old_index_path, ignore_errors=True)
+
+    def _add_documents(
+        self,
+        documents: List[Document],
+        db: Optional[FAISS] = None,
+        batch_size: int = 100,
+        concurrency: int = 20,
+    ) -> FAISS:
+        """Embed the documents and add them to the given staging db.
+
+        Args:
+            documents (List[Document]): The documents to add.
+            db (Optional[FAISS], optional): The staging db, created if not given.
+            batch_size (int, optional): The number of documents per embedding request.
+            concurrency (int, optional): The max number of embedding requests in flight.
+
+        Returns:
+            FAISS: The staging db with the documents added.
+        """
+        # Embed the documents in batches, with the batch requests sent concurrently.
+        texts = [doc.page_content for doc in documents]
+        metadatas = [doc.metadata for doc in documents]
+        if self.verbose:
+            self.logger.info(
+                f"Embedding {len(texts)} documents with batch size {batch_size}."
+            )
+        vectors = self._embed_documents(
+            texts=texts, batch_size=batch_size, concurrency=concurrency
+        )
+        if not db:
+            # Stage the vectors in full precision, the graph of an hnsw index
+            # is only built once they are merged into the vector db.
+            db = self._create_embeddings_db(index=faiss.IndexFlatL2(vectors.shape[1]))
+        # Add the vectors to the index in bulk, and the documents to the docstore.
+        index_to_docstore_id = db.index_to_docstore_id
+        start_idx = len(index_to_docstore_id)
+        doc_ids = [str(uuid.uuid4()) for _ in texts]
+        db.index.add(vectors)
+        db.docstore.add(  # type: ignore
+            {
+                doc_id: Document(page_content=text, metadata=metadata)
+                for doc_id, text, metadata in zip(doc_ids, texts, metadatas)
+            }
+        )
+        index_to_docstore_id.update(
+            {start_idx + i: doc_id for i, doc_id in enumerate(doc_ids)}
+        )
+        return db
+
+    def _merge_embeddings_db(self, staging_db: FAISS, index_type: str = "flat") -> None:
+        """Add the vectors and documents of a staging db to the vector db.
+
+        Args:
+            staging_db (FAISS): The staging db of a fully embedded file.
+            index_type (str, optional): The type of the index if a new db is created.
+        """
+        if not self.embeddings_db:
+            self.embeddings_db = self._create_embeddings_db(
+                index=self._create_index(dim=staging_db.index.d, index_type=index_type)
+            )
+        index_to_docstore_id = self.embeddings_db.index_to_docstore_id
+        start_idx = len(index_to_docstore_id)
+        # Copy the vectors, as hnsw indexes do not support merge_from.
+        self.embeddings_db.index.add(
+            staging_db.index.reconstruct_n(0, staging_db.index.ntotal)
+        )
+        self.embeddings_db.docstore.add(  # type: ignore
+            {
+                doc_id: staging_db.docstore.search(doc_id)
+                for doc_id in staging_db.index_to_docstore_id.values()
+            }
+        )
+        index_to_docstore_id.update(
+            {
+                start_idx + i: doc_id
+                for i, doc_id in staging_db.index_to_docstore_id.items()
+            }
+        )
+
+    def _create_embeddings_db(self, index: Any) -> FAISS:
+        """Create an empty vector db, the documents are added to it in place.
+
+        Args:
+            index (Any): The empty FAISS index.
+
+        Returns:
+            FAISS: The vector db.
+        """
+        return FAISS(
+            embedding_function=self.embeddings_tool.embed_query,
+            index=index,
+            docstore=InMemoryDocstore({}),
+            index_to_docstore_id={},
+        )
+
+    def _create_index(self, dim: int, index_type: str = "flat") -> Any:
+        """Create an empty FAISS index.
+
+        Args:
+            dim (int): The dimension of the vectors.
+            index_type (str, optional): The type of the index. "flat" scans all the
+                vectors (stored as float16 to halve the footprint) for exact search,
+                "hnsw" builds a graph for sub-linear approximate search.
+
+        Returns:
+            Any: The FAISS index.
+        """
+        if index_type == "flat":
+            return faiss.IndexScalarQuantizer(
+                dim, faiss.ScalarQuantizer.QT_fp16, faiss.METRIC_L2
+            )
+        if index_type == "hnsw":
+            index = faiss.IndexHNSWFlat(dim, 32)
+            index.hnsw.efConstruction = 200
+            return index
+        raise ValueError(f"Unsupported index type: {index_type}.")
+
+    def _embed_documents(
+        self, texts: List[str], batch_size: int = 100, concurrency: int = 20
+    ) -> np.ndarray:
+        """Embed the texts in batches. The batches are sent concurrently by the
+        embedding threads as the embedding is bound by the network latency, and
+        each batch is written into its slice of one preallocated float32 array.
+
+        Args:
+            texts (List[str]): The texts to embed.
+            batch_size (int, optional): The number of texts per embedding request.
+            concurrency (int, optional): The max number of embedding requests in flight.
+
+        Returns:
+            np.ndarray: The embeddings, one row per text in the same order as the texts.
+        """
+        if self.embeddings_executor is None or (
+            self.embeddings_concurrency != concurrency
+        ):
+            if self.embeddings_executor is not None:
+                self.embeddings_executor.shutdown()
+            self.embeddings_executor = ThreadPoolExecutor(max_workers=concurrency)
+            self.embeddings_concurrency = concurrency
+        # Allocated once the first batch tells the dimension of the embeddings.
+        vectors: Optional[np.ndarray] = None
+        vectors_lock = threading.Lock()
+
+        def embed_batch(start_idx: int) -> None:
+            nonlocal vectors
+            batch = texts[start_idx : start_idx + batch_size]
+            embeddings = self.embeddings_tool.embed_documents(  # type: ignore
+                batch, chunk_size=batch_size
+            )
+            with vectors_lock:
+                if vectors is None:
+                    vectors = np.empty(
+                        (len(texts), len(embeddings[0])), dtype=np.float32
+                    )
+            vectors[start_idx : start_idx + len(batch)] = embeddings
+
+        futures = [
+            self.embeddings_executor.submit(embed_batch, start_idx)
+            for start_idx in range(0, len(texts), batch_size)
+        ]
+        for future in futures:
+            future.result()
+        if vectors is None:
+            return np.empty((0, 0), dtype=np.float32)
+        return vectors
@@ -1,12 +1,14 @@
 """Core logic of custom LLMs.
 """
 import os
-from typing import List, Optional
+import threading
+from typing import Any, List, Optional
 
 import google.generativeai as palm
 import openai
 from Bard import Chatbot as BardChat
 from langchain.llms.base import LLM
+from pydantic import PrivateAttr
 from revChatGPT.V1 import Chatbot
 
 
@@ -55,6 +57,12 @@ class ChatGPT(LLM):
 
 class RevChatGPT(LLM):
     test_mode: bool = False
+    # The chatbot authenticates on creation, so it is reused across calls.
+    # Each call starts a new conversation, and the calls are serialized as the
+    # chatbot keeps the conversation state.
+    _chatbot: Any = PrivateAttr(default=None)
+    _access_token: Optional[str] = PrivateAttr(default=None)
+    _lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
 
     @property
     def _llm_type(self) -> str:
@@ -80,18 +88,28 @@ class RevChatGPT(LLM):
         if not access_token:
             return "Please set CHATGPT_ACCESS_TOKEN before chatting with ChatGPT."
 
-        chatgpt = Chatbot(
-            config={
-                "access_token": access_token,
-            }
-        )
-        for data in chatgpt.ask(prompt):
-            response = data["message"]
+        with self._lock:
+            if self._chatbot is None or self._access_token != access_token:
+                self._chatbot = Chatbot(
+                    config={
+                        "access_token": access_token,
+                    }
+                )
+                self._access_token = access_token
+            self._chatbot.reset_chat()
+            for data in self._chatbot.ask(prompt):
+                response = data["message"]
         return response
 
 
 class RevBard(LLM):
     test_mode: bool = False
+    # The chatbot authenticates on creation, so it is reused across calls.
+    # Each call starts a new conversation, and the calls are serialized as the
+    # chatbot keeps the conversation state.
+    _bard: Any = PrivateAttr(default=None)
+    _session_token: Optional[str] = PrivateAttr(default=None)
+    _lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
 
     @property
     def _llm_type(self) -> str:
@@ -117,8 +135,14 @@ class RevBard(LLM):
         if not access_token:
             return "Please set BARD_SESSION_TOKEN before chatting with Bard."
 
-        bard = BardChat(session_id=os.getenv("BARD_SESSION_TOKEN"))
-        response = bard.ask(message=prompt)
+        with self._lock:
+            if self._bard is None or self._session_token != access_token:
+                self._bard = BardChat(session_id=access_token)
+                self._session_token = access_token
+            self._bard.conversation_id = ""
+            self._bard.response_id = ""
+            self._bard.choice_id = ""
+            response = self._bard.ask(message=prompt)
         return response["content"]  # type: ignore
 
 
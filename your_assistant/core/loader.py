@@ -2,7 +2,7 @@
 """
 import os
 import shutil
-from typing import Any, Dict, List
+from typing import Any, Dict, Iterator, List
 
 import ebooklib
 import fitz
@@ -56,6 +56,14 @@ class EpubLoader(BaseLoader):
         Returns:
             A dictionary containing authors, title, and chunked contents.
         """
+        return list(self.lazy_load())
+
+    def lazy_load(self) -> Iterator[Document]:
+        """Parse a .epub file lazily, yielding the content page by page.
+
+        Returns:
+            An iterator of Document objects containing page_content and metadata.
+        """
         file_extension = os.path.splitext(self.path)[1]
 
         if file_extension != ".epub":
@@ -65,7 +73,6 @@ class EpubLoader(BaseLoader):
         title = book.get_metadata("DC", "title")[0][0]
         authors = [author[0] for author in book.get_metadata("DC", "creator")]
 
-        documents: List[Document] = []
         page_number = 0
         for item in book.get_items():
             if item.get_type() == ebooklib.ITEM_DOCUMENT:
@@ -73,18 +80,15 @@ class EpubLoader(BaseLoader):
                 content = item.get_content().decode("utf-8")
                 if "<?xml version='1.0' encoding='utf-8'?>" in content:
                     content = xml_to_markdown(content)
-                documents.append(
-                    Document(
-                        page_content=content,
-                        metadata={
-                            "source": self.path,
-                            "title": title,
-                            "authors": authors,
-                            "page": page_number,
-                        },
-                    )
+                yield Document(
+                    page_content=content,
+                    metadata={
+                        "source": self.path,
+                        "title": title,
+                        "authors": authors,
+                        "page": page_number,
+                    },
                 )
-        return documents
 
 
 class PdfLoader(BaseLoader):
@@ -100,6 +104,14 @@ class PdfLoader(BaseLoader):
         Returns:
             A list of Document objects containing page_content and metadata.
         """
+        return list(self.lazy_load())
+
+    def lazy_load(self) -> Iterator[Document]:
+        """Parse a .pdf file lazily, yielding the content page by page.
+
+        Returns:
+            An iterator of Document objects containing page_content and metadata.
+        """
         file_extension = os.path.splitext(self.path)[1]
 
         if file_extension != ".pdf":
@@ -109,21 +121,15 @@ class PdfLoader(BaseLoader):
         title = pdf_doc.metadata["title"]
         authors = pdf_doc.metadata["author"].split(", ")
 
-        documents: List[Document] = []
-
         for page_number in range(len(pdf_doc)):
             page = pdf_doc.load_page(page_number)
             content = page.get_text("text")
-            documents.append(
-                Document(
-                    page_content=content,
-                    metadata={
-                        "source": self.path,
-                        "title": title,
-                        "authors": authors,
-                        "page": page_number + 1,
-                    },
-                )
+            yield Document(
+                page_content=content,
+                metadata={
+                    "source": self.path,
+                    "title": title,
+                    "authors": authors,
+                    "page": page_number + 1,
+                },
             )
-
-        return documents
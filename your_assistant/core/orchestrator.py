@@ -12,11 +12,12 @@ from langchain.llms.base import LLM
 from langchain.memory import ConversationSummaryBufferMemory
 from langchain.schema import HumanMessage
 
-from your_assistant.core.indexer import KnowledgeIndexer
-from your_assistant.core.llm import PaLM, RevBard, RevChatGPT
-from your_assistant.core.responder import DocumentQA
 from your_assistant.core.utils import Logger, load_env
 
+# The indexer, responder and custom LLMs pull in heavy dependencies (e.g. FAISS,
+# nltk, the reverse engineered clients), so they are imported by the
+# orchestrators that use them when initialized.
+
 
 class Orchestrator(ABC):
     """The abstract orchestrator."""
@@ -184,6 +185,8 @@ class PaLMOrchestrator(LLMOrchestrator):
         self.model = args.model
         self.temperature = args.temperature
         self.max_tokens = args.max_token
+        from your_assistant.core.llm import PaLM
+
         self.llm = PaLM()
 
     @classmethod
@@ -277,6 +280,8 @@ class RevChatGPTOrchestrator(LLMOrchestrator):
         super().__init__(args=args)
 
     def _init_llm(self, args: argparse.Namespace) -> None:
+        from your_assistant.core.llm import RevChatGPT
+
         self.llm = RevChatGPT()
 
     @classmethod
@@ -305,6 +310,8 @@ class RevBardOrchestrator(LLMOrchestrator):
         super().__init__(args=args)
 
     def _init_llm(self, args: argparse.Namespace) -> None:
+        from your_assistant.core.llm import RevBard
+
         self.llm = RevBard()
 
     @classmethod
@@ -329,6 +336,7 @@ class KnowledgeIndexOrchestrator(Orchestrator):
     def __init__(self, args: argparse.Namespace):
         """Initialize the orchestrator."""
         super().__init__(args=args)
+        from your_assistant.core.indexer import KnowledgeIndexer
 
         self.indexer = KnowledgeIndexer(args=args)
 
@@ -369,6 +377,14 @@ class KnowledgeIndexOrchestrator(Orchestrator):
             type=int,
             help="The overlap of the chunk to partition the document into sections for embedding. Default is 50.",
         )
+        parser.add_argument(
+            "--index-type",
+            default="flat",
+            choices=["flat", "hnsw"],
+            type=str,
+            help="The type of the index to create, flat for exact search or hnsw for fast search at scale. "
+            "Default is flat.",
+        )
 
     @classmethod
     def create_from_args(cls, args: argparse.Namespace) -> "Orchestrator":
@@ -381,27 +397,30 @@ class KnowledgeIndexOrchestrator(Orchestrator):
             args (argparse.Namespace): The arguments to the orchestrator.
         """
         path, chunk_size, chunk_overlap = args.path, args.chunk_size, args.chunk_overlap
+        index_type = args.index_type
         if not os.path.exists(path):
             raise FileNotFoundError(f"Path {path} does not exist.")
-        # Use a for loop to index each file if path is a directory.
-        # Use an array to store the response of each index, and then concatenate them.
+        # Index all the files together if path is a directory, so they are parsed in parallel.
         if os.path.isdir(path):
             if self.verbose:
                 self.logger.info(f"Indexing files in {path}...")
-            responses = []
-            for file in os.listdir(path):
-                if file.startswith("."):
-                    continue
-                file_path = os.path.join(path, file)
-                response = self.indexer.index(
-                    path=file_path, chunk_size=chunk_size, chunk_overlap=chunk_overlap
-                )
-                if response:
-                    responses.append(response)
-            return "\n".join(responses)
+            file_paths = [
+                os.path.join(path, file)
+                for file in sorted(os.listdir(path))
+                if not file.startswith(".")
+            ]
+            return self.indexer.index(
+                path=file_paths,
+                chunk_size=chunk_size,
+                chunk_overlap=chunk_overlap,
+                index_type=index_type,
+            )
         else:
             response = self.indexer.index(
-                path=path, chunk_size=chunk_size, chunk_overlap=chunk_overlap
+                path=path,
+                chunk_size=chunk_size,
+                chunk_overlap=chunk_overlap,
+                index_type=index_type,
             )
             return response
 
@@ -412,6 +431,8 @@ class QAOrchestrator(Orchestrator):
     def __init__(self, args: argparse.Namespace):
         """Initialize the orchestrator."""
         super().__init__(args=args)
+        from your_assistant.core.responder import DocumentQA
+
         self.qa = DocumentQA(
             db_name=args.db_name,
             llm_type=args.llm_type,
@@ -1,25 +1,66 @@
 """Run the orchestrator in the command line.
 """
+import argparse
+import importlib
+from typing import Any, Type
+
 from colorama import Fore, Style
 
 import your_assistant.core.utils as utils
-from your_assistant.core.orchestrator import *
 
+# The orchestrators are loaded lazily by (module path, class name), so that only
+# the chosen one and its dependencies are imported.
 ORCHESTRATORS = {
-    "ChatGPT": ChatGPTOrchestrator,
-    "Claude": AnthropicOrchestrator,
-    "RevChatGPT": RevChatGPTOrchestrator,
-    "RevBard": RevBardOrchestrator,
-    "QA": QAOrchestrator,
-    "KnowledgeIndex": KnowledgeIndexOrchestrator,
+    "ChatGPT": ("your_assistant.core.orchestrator", "ChatGPTOrchestrator"),
+    "Claude": ("your_assistant.core.orchestrator", "AnthropicOrchestrator"),
+    "RevChatGPT": ("your_assistant.core.orchestrator", "RevChatGPTOrchestrator"),
+    "RevBard": ("your_assistant.core.orchestrator", "RevBardOrchestrator"),
+    "QA": ("your_assistant.core.orchestrator", "QAOrchestrator"),
+    "KnowledgeIndex": (
+        "your_assistant.core.orchestrator",
+        "KnowledgeIndexOrchestrator",
+    ),
 }
 
 
+def load_orchestrator(name: str) -> Type[Any]:
+    """Import the orchestrator class by name.
+
+    Args:
+        name (str): The name of the orchestrator.
+
+    Returns:
+        Type[Any]: The orchestrator class.
+    """
+    module_path, class_name = ORCHESTRATORS[name]
+    return getattr(importlib.import_module(module_path), class_name)
+
+
+def parse_args() -> argparse.Namespace:
+    """Parse the arguments. The orchestrator name is parsed first, so that only
+    the chosen orchestrator is imported to add its arguments to the parser.
+
+    Returns:
+        argparse.Namespace: The parsed arguments.
+    """
+    name_parser = argparse.ArgumentParser(add_help=False)
+    name_parser.add_argument("-v", "--verbose", action="store_true")
+    name_parser.add_argument("orchestrator", nargs="?")
+    known_args, _ = name_parser.parse_known_args()
+    if known_args.orchestrator in ORCHESTRATORS:
+        orchestrator_cls = load_orchestrator(known_args.orchestrator)
+        parser = utils.init_parsers({known_args.orchestrator: orchestrator_cls})
+        return parser.parse_args()
+    # Show the usage with all the supported orchestrators.
+    parser = argparse.ArgumentParser(description="Orchestrator")
+    parser.add_argument("orchestrator", choices=list(ORCHESTRATORS))
+    return parser.parse_args()
+
+
 # Define the function that runs the orchestrator.
 def run():
-    parser = utils.init_parsers(ORCHESTRATORS)
-    args = parser.parse_args()
-    orchestrator_cls = ORCHESTRATORS[args.orchestrator]
+    args = parse_args()
+    orchestrator_cls = load_orchestrator(args.orchestrator)
     orchestrator = orchestrator_cls.create_from_args(args)
     params = vars(args)
     print(f"You are using {args.orchestrator}, with parameters: {params}")
@@ -2,10 +2,17 @@
 Run this test with command: pytest your_assistant/tests/core/test_indexer.py
 """
 import argparse
+import asyncio
+import json
 import os
+import re
+import shutil
 from unittest.mock import MagicMock
 
+import faiss
+import numpy as np
 import pytest
+from langchain.docstore.document import Document
 from langchain.embeddings import OpenAIEmbeddings
 from langchain.vectorstores import FAISS
 
@@ -15,16 +22,35 @@ from your_assistant.core.utils import load_env
 
 
 @pytest.fixture()
-def setup():
+def setup(tmp_path):
     test_folder_path = os.path.dirname(os.path.abspath(__file__))
     root_path = os.path.dirname(os.path.dirname(os.path.dirname(test_folder_path)))
     args = argparse.Namespace()
     args.verbose = False
-    args.db_path = "faiss.db"
+    args.db_path = str(tmp_path / "faiss.db")
     args.embeddings_tool_name = "openai"
     return root_path, args
 
 
+@pytest.fixture()
+def mock_indexer(setup):
+    """Create indexers on a temporary db with a fake embeddings tool."""
+    root_path, args = setup
+    for key in os.environ:
+        del os.environ[key]
+    load_env(env_file_path=os.path.join(root_path, ".env.template"))
+
+    def create_indexer():
+        knowledge_indexer = indexer.KnowledgeIndexer(args=args)
+        knowledge_indexer.embeddings_tool = MagicMock()
+        knowledge_indexer.embeddings_tool.embed_documents.side_effect = (
+            lambda texts, **kwargs: [[float(i), 1.0, 0.0] for i in range(len(texts))]
+        )
+        return knowledge_indexer
+
+    return create_indexer
+
+
 class TestIndexer:
     @pytest.mark.parametrize(
         "db_path, config_file, expected",
@@ -33,11 +59,9 @@ class TestIndexer:
             ("test-faiss.db", ".env.template", type(None)),
         ],
     )
-    def test_index_init_index_db(self, setup, db_path, config_file, expected):
+    def test_index_init_index_db(self, setup, tmp_path, db_path, config_file, expected):
         root_path, args = setup
-        args.db_path = (
-            os.path.join(os.path.dirname(__file__), db_path) if db_path else None
-        )
+        args.db_path = str(tmp_path / db_path) if db_path else None
         for key in os.environ:
             del os.environ[key]
         load_env(env_file_path=os.path.join(root_path, config_file))
@@ -154,9 +178,277 @@ class TestIndexer:
                 )
             assert str(e.value) == expected.args[0]
         else:
-            data = knowledge_indexer._extract_data(
-                loader=loader, chunk_size=chunk_size, chunk_overlap=chunk_overlap
+            data = list(
+                knowledge_indexer._extract_data(
+                    loader=loader, chunk_size=chunk_size, chunk_overlap=chunk_overlap
+                )
             )
             assert len(data) == 1
             assert data[0].page_content.strip() == expected.strip()
             assert source == path
+
+    def test_indexer_index_embeddings(self, mock_indexer):
+        knowledge_indexer = mock_indexer()
+        documents = [
+            Document(page_content=f"Chunk, {i}!", metadata={}) for i in range(5)
+        ]
+        assert knowledge_indexer._index_embeddings(
+            documents=documents, source="test-source", batch_size=2
+        )
+        assert isinstance(knowledge_indexer.embeddings_db, FAISS)
+        assert knowledge_indexer.embeddings_db.index.ntotal == 5
+        assert knowledge_indexer.embeddings_tool.embed_documents.call_count == 3
+        assert knowledge_indexer._is_indexed("test-source")
+        assert documents[0].page_content == "Chunk 0"
+        executor = knowledge_indexer.embeddings_executor
+        # Index the same source again should be skipped.
+        assert not knowledge_indexer._index_embeddings(
+            documents=documents, source="test-source", batch_size=2
+        )
+        # Index a new source should add to the existing db.
+        documents = [
+            Document(page_content=f"Another chunk {i}", metadata={}) for i in range(5)
+        ]
+        assert knowledge_indexer._index_embeddings(
+            documents=documents, source="another-source", batch_size=2
+        )
+        # The embedding threads are kept to reuse the connections.
+        assert knowledge_indexer.embeddings_executor is executor
+        db = FAISS.load_local(
+            knowledge_indexer.db_index_path, knowledge_indexer.embeddings_tool
+        )
+        assert db.index.ntotal == 10
+        assert not os.path.exists(f"{knowledge_indexer.db_index_path}.tmp")
+        assert not os.path.exists(f"{knowledge_indexer.db_index_path}.old")
+
+    def test_indexer_restore_index_db(self, mock_indexer):
+        knowledge_indexer = mock_indexer()
+        documents = [Document(page_content=f"Chunk {i}", metadata={}) for i in range(3)]
+        assert knowledge_indexer._index_embeddings(
+            documents=documents, source="test-source"
+        )
+        # A save stopped after moving the db aside keeps the previous db.
+        db_index_path = knowledge_indexer.db_index_path
+        os.rename(db_index_path, f"{db_index_path}.old")
+        knowledge_indexer = mock_indexer()
+        assert knowledge_indexer.embeddings_db.index.ntotal == 3
+        assert not os.path.exists(f"{db_index_path}.old")
+
+    @pytest.mark.parametrize(
+        "index_type, expected",
+        [
+            ("flat", faiss.IndexScalarQuantizer),
+            ("hnsw", faiss.IndexHNSWFlat),
+            ("invalid", ValueError("Unsupported index type: invalid.")),
+        ],
+    )
+    def test_indexer_create_index(self, mock_indexer, index_type, expected):
+        knowledge_indexer = mock_indexer()
+        if isinstance(expected, ValueError):
+            with pytest.raises(ValueError) as e:
+                knowledge_indexer._create_index(dim=3, index_type=index_type)
+            assert str(e.value) == expected.args[0]
+        else:
+            index = knowledge_indexer._create_index(dim=3, index_type=index_type)
+            assert type(index) == expected
+            assert index.d == 3
+
+    def test_indexer_migrate_index_record(self, mock_indexer, tmp_path):
+        db_path = tmp_path / "faiss.db"
+        os.makedirs(db_path)
+        legacy_record_path = db_path / "index_record.json"
+        with open(legacy_record_path, "w") as f:
+            json.dump({"indexed_doc": ["legacy-source"]}, f)
+        knowledge_indexer = mock_indexer()
+        assert knowledge_indexer._is_indexed("legacy-source")
+        assert not knowledge_indexer._is_indexed("new-source")
+        assert not os.path.exists(legacy_record_path)
+
+    def test_indexer_get_text_splitter(self):
+        text_splitter = indexer.get_text_splitter(chunk_size=500, chunk_overlap=50)
+        same_splitter = indexer.get_text_splitter(chunk_size=500, chunk_overlap=50)
+        other_splitter = indexer.get_text_splitter(chunk_size=1000, chunk_overlap=50)
+        assert same_splitter is text_splitter
+        assert other_splitter is not text_splitter
+
+    def test_indexer_index_embeddings_stream(self, mock_indexer):
+        knowledge_indexer = mock_indexer()
+        knowledge_indexer._add_documents = MagicMock(
+            wraps=knowledge_indexer._add_documents
+        )
+        documents = (Document(page_content=f"Chunk {i}", metadata={}) for i in range(5))
+        assert knowledge_indexer._index_embeddings(
+            documents=documents, source="test-source", batch_size=2, concurrency=1
+        )
+        # The stream is flushed every 2 documents, and the tail at the end.
+        assert knowledge_indexer._add_documents.call_count == 3
+        assert knowledge_indexer.embeddings_db.index.ntotal == 5
+
+    def test_indexer_index_embeddings_dedup(self, mock_indexer):
+        knowledge_indexer = mock_indexer()
+        documents = [
+            Document(page_content="Header", metadata={}),
+            Document(page_content="Chunk 0", metadata={}),
+            Document(page_content="Header!", metadata={}),
+            Document(page_content="Chunk 1", metadata={}),
+        ]
+        assert knowledge_indexer._index_embeddings(
+            documents=documents, source="test-source"
+        )
+        assert knowledge_indexer.embeddings_db.index.ntotal == 3
+        # The chunks indexed from other sources are skipped as well.
+        documents = [
+            Document(page_content="Header", metadata={}),
+            Document(page_content="Chunk 2", metadata={}),
+        ]
+        assert knowledge_indexer._index_embeddings(
+            documents=documents, source="another-source"
+        )
+        assert knowledge_indexer.embeddings_db.index.ntotal == 4
+
+    @pytest.mark.parametrize("is_downloaded", [True, False])
+    def test_indexer_ensure_nltk_tagger(self, mocker, is_downloaded):
+        mocker.patch.object(indexer, "_nltk_tagger_ready", False)
+        find = mocker.patch.object(
+            indexer.nltk.data,
+            "find",
+            side_effect=None if is_downloaded else LookupError(),
+        )
+        download = mocker.patch.object(indexer.nltk, "download")
+        indexer.ensure_nltk_tagger()
+        indexer.ensure_nltk_tagger()
+        assert find.call_count == 1
+        assert download.call_count == (0 if is_downloaded else 1)
+
+    def test_indexer_index_multiple_files(self, mock_indexer, tmp_path):
+        knowledge_indexer = mock_indexer()
+        test_pdf_path = os.path.join(os.path.dirname(__file__), "testdata/test-pdf.pdf")
+        paths = [str(tmp_path / "first.pdf"), str(tmp_path / "second.pdf")]
+        for path in paths:
+            shutil.copyfile(test_pdf_path, path)
+        response = knowledge_indexer.index(path=paths)
+        assert response == "\n".join(f"Index {path} finished." for path in paths)
+        assert all(knowledge_indexer._is_indexed(path) for path in paths)
+        # Both files have the same content, so the second one is deduplicated.
+        assert knowledge_indexer.embeddings_db.index.ntotal == 1
+        # The indexed files are skipped.
+        assert knowledge_indexer.index(path=paths) == ""
+
+    def test_indexer_index_multiple_files_failure(self, mock_indexer, tmp_path):
+        knowledge_indexer = mock_indexer()
+        test_pdf_path = os.path.join(os.path.dirname(__file__), "testdata/test-pdf.pdf")
+        paths = [str(tmp_path / f"{name}.pdf") for name in ["a", "b", "c"]]
+        shutil.copyfile(test_pdf_path, paths[0])
+        with open(paths[1], "wb") as f:
+            f.write(b"This is not a pdf file.")
+        shutil.copyfile(test_pdf_path, paths[2])
+        response = knowledge_indexer.index(path=paths).split("\n")
+        # The corrupt file is reported, and the other files are still indexed.
+        assert response[0] == f"Index {paths[0]} finished."
+        assert response[1].startswith(f"Index {paths[1]} failed: ")
+        assert response[2] == f"Index {paths[2]} finished."
+        assert not knowledge_indexer._is_indexed(paths[1])
+        knowledge_indexer = mock_indexer()
+        assert knowledge_indexer._is_indexed(paths[0])
+        assert knowledge_indexer.embeddings_db.index.ntotal == 1
+
+    @pytest.mark.parametrize(
+        "text, expected",
+        [
+            ("Hello, world!", "Hello world"),
+            ("It's a \"quote\" -- isn't it?", "Its a quote  isnt it"),
+            ("snake_case 42\n\tnew line", "snake_case 42\n\tnew line"),
+            ("Café, naïve… 東京。", "Café naïve 東京"),
+            ("", ""),
+        ],
+    )
+    def test_strip_punctuation(self, text, expected):
+        assert indexer.strip_punctuation(text) == expected
+        assert indexer.strip_punctuation(text) == re.sub(r"[^\w\s]", "", text)
+
+    def test_indexer_index_embeddings_deferred_save(self, mock_indexer):
+        knowledge_indexer = mock_indexer()
+        knowledge_indexer._save_embeddings_db = MagicMock(
+            wraps=knowledge_indexer._save_embeddings_db
+        )
+        for source in ["first-source", "second-source"]:
+            documents = [Document(page_content=f"Chunk of {source}", metadata={})]
+            assert knowledge_indexer._index_embeddings(
+                documents=documents, source=source, save=False
+            )
+        # The unsaved documents are treated as indexed, but not recorded yet.
+        assert knowledge_indexer._is_indexed("first-source")
+        assert not os.path.exists(knowledge_indexer.db_index_path)
+        knowledge_indexer._save_index()
+        knowledge_indexer._save_index()
+        assert knowledge_indexer._save_embeddings_db.call_count == 1
+        assert not knowledge_indexer.unsaved_records
+        assert knowledge_indexer._is_indexed("second-source")
+        db = FAISS.load_local(
+            knowledge_indexer.db_index_path, knowledge_indexer.embeddings_tool
+        )
+        assert db.index.ntotal == 2
+
+    def test_indexer_index_embeddings_failure(self, mock_indexer):
+        knowledge_indexer = mock_indexer()
+        documents = [
+            Document(page_content=f"Chunk a{i}", metadata={}) for i in range(2)
+        ]
+        assert knowledge_indexer._index_embeddings(
+            documents=documents, source="a", batch_size=2, concurrency=1, save=False
+        )
+        # The embedding request fails after the first batch of "b" is added.
+        knowledge_indexer.embeddings_tool.embed_documents.side_effect = [
+            [[0.0, 1.0, 0.0], [1.0, 1.0, 0.0]],
+            RuntimeError("API error"),
+        ]
+        documents = [
+            Document(page_content=f"Chunk b{i}", metadata={}) for i in range(3)
+        ]
+        with pytest.raises(RuntimeError):
+            try:
+                knowledge_indexer._index_embeddings(
+                    documents=documents,
+                    source="b",
+                    batch_size=2,
+                    concurrency=1,
+                    save=False,
+                )
+            finally:
+                knowledge_indexer._save_index()
+        assert knowledge_indexer._is_indexed("a")
+        assert not knowledge_indexer._is_indexed("b")
+        assert knowledge_indexer.embeddings_db.index.ntotal == 2
+        # Retry "b" on a fresh indexer, the vectors of the failed run are not kept.
+        knowledge_indexer = mock_indexer()
+        documents = [
+            Document(page_content=f"Chunk b{i}", metadata={}) for i in range(3)
+        ]
+        assert knowledge_indexer._index_embeddings(
+            documents=documents, source="b", batch_size=2, concurrency=1
+        )
+        assert knowledge_indexer.embeddings_db.index.ntotal == 5
+        assert len(knowledge_indexer.embeddings_db.index_to_docstore_id) == 5
+
+    def test_indexer_embed_documents(self, mock_indexer):
+        knowledge_indexer = mock_indexer()
+        knowledge_indexer.embeddings_tool.embed_documents.side_effect = (
+            lambda texts, **kwargs: [[float(text), 1.0, 0.0] for text in texts]
+        )
+        texts = [str(i) for i in range(5)]
+        vectors = knowledge_indexer._embed_documents(texts=texts, batch_size=2)
+        assert vectors.dtype == np.float32
+        assert vectors.shape == (5, 3)
+        assert vectors[:, 0].tolist() == [0.0, 1.0, 2.0, 3.0, 4.0]
+
+    def test_indexer_embed_documents_in_event_loop(self, mock_indexer):
+        knowledge_indexer = mock_indexer()
+
+        async def embed_documents():
+            return knowledge_indexer._embed_documents(
+                texts=["a", "b", "c"], batch_size=2
+            )
+
+        # The indexer can be called from a running event loop, e.g. in a notebook.
+        vectors = asyncio.run(embed_documents())
+        assert vectors.shape == (3, 3)
@@ -97,3 +97,52 @@ class TestLLMs:
         load_env(env_file_path=os.path.join(root_path, config_file))
         llm = llm_lib.PaLM(test_mode=test_mode)
         assert llm("This is a test PaLM prompt.") == expected
+
+    def test_revchatgpt_reuse_chatbot(self, setup, mocker):
+        """Test the RevChatGPT LLM reuses the chatbot across calls."""
+        root_path = setup
+        for key in os.environ:
+            del os.environ[key]
+        load_env(env_file_path=os.path.join(root_path, ".env.template"))
+        chatbot = mocker.patch.object(llm_lib, "Chatbot")
+        chatbot.return_value.ask.return_value = [{"message": "Hello."}]
+        llm = llm_lib.RevChatGPT()
+        assert llm("This is a test prompt.") == "Hello."
+        assert llm("This is another test prompt.") == "Hello."
+        assert chatbot.call_count == 1
+        # Each prompt starts a new conversation.
+        assert chatbot.return_value.mock_calls == [
+            mocker.call.reset_chat(),
+            mocker.call.ask("This is a test prompt."),
+            mocker.call.reset_chat(),
+            mocker.call.ask("This is another test prompt."),
+        ]
+        # Recreate the chatbot if the access token changes.
+        os.environ["CHATGPT_ACCESS_TOKEN"] = "another-chatgpt-access-token"
+        assert llm("This is a test prompt.") == "Hello."
+        assert chatbot.call_count == 2
+
+    def test_revbard_reuse_chatbot(self, setup, mocker):
+        """Test the RevBard LLM reuses the chatbot across calls."""
+        root_path = setup
+        for key in os.environ:
+            del os.environ[key]
+        load_env(env_file_path=os.path.join(root_path, ".env.template"))
+        bard_chat = mocker.patch.object(llm_lib, "BardChat")
+        bard = bard_chat.return_value
+        conversations = []
+
+        def ask(message):
+            # Record the conversation the prompt is sent to, then continue it.
+            conversations.append((bard.conversation_id, bard.response_id))
+            bard.conversation_id, bard.response_id = "conversation", "response"
+            return {"content": "Hello."}
+
+        bard.ask.side_effect = ask
+        llm = llm_lib.RevBard()
+        assert llm("This is a test prompt.") == "Hello."
+        assert llm("This is another test prompt.") == "Hello."
+        assert bard_chat.call_count == 1
+        # Each prompt starts a new conversation.
+        assert conversations == [("", ""), ("", "")]
+        assert bard.choice_id == ""